@@ -43,16 +43,9 @@ def zone_occupancy(
 
 def violation_breakdown(decisions: list[LegalityDecision]) -> dict[str, int]:
     """Count occurrences of each unique reason_code across all decisions."""
-    counts: dict[str, int] = {}
-    for d in decisions:
-        for code in d.reason_codes:
-            counts[code] = counts.get(code, 0) + 1
-    return counts
+    return dict(Counter(code for d in decisions for code in d.reason_codes))
 
 
 def detection_summary(detections: list[Detection]) -> dict[str, int]:
     """Count detections by label (car, truck, bus, motorcycle, bicycle)."""
-    counts: dict[str, int] = {}
-    for d in detections:
-        counts[d.label] = counts.get(d.label, 0) + 1
-    return counts
+    return dict(Counter(d.label for d in detections))
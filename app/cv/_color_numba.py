@@ -0,0 +1,72 @@
+"""Numba-compiled color segmentation kernel for LaneDetector.
+
+Importing this module requires numba; callers fall back to OpenCV's
+cvtColor + inRange when it is not installed or fails to compile.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit, prange
+
+from app.cv._numba_parallel import PARALLEL_LOCK
+
+# Fixed-point reciprocal tables matching OpenCV's 8-bit BGR2HSV conversion,
+# so the fused kernel yields exactly the masks cv2.inRange would.
+_HSV_SHIFT = 12
+_SDIV = np.zeros(256, dtype=np.int32)
+_HDIV = np.zeros(256, dtype=np.int32)
+_SDIV[1:] = np.round((255 << _HSV_SHIFT) / np.arange(1, 256, dtype=np.float64))
+_HDIV[1:] = np.round((180 << _HSV_SHIFT) / (6.0 * np.arange(1, 256, dtype=np.float64)))
+
+
+@njit(cache=True, parallel=True)
+def _segment(bgr, bus_lo, bus_hi, bike_lo, bike_hi, sdiv, hdiv):
+    rows, cols = bgr.shape[0], bgr.shape[1]
+    bus = np.empty((rows, cols), dtype=np.uint8)
+    bike = np.empty((rows, cols), dtype=np.uint8)
+    # Hoist the thresholds into scalars so the pixel loop stays in registers
+    bh0, bs0, bv0 = np.int32(bus_lo[0]), np.int32(bus_lo[1]), np.int32(bus_lo[2])
+    bh1, bs1, bv1 = np.int32(bus_hi[0]), np.int32(bus_hi[1]), np.int32(bus_hi[2])
+    kh0, ks0, kv0 = np.int32(bike_lo[0]), np.int32(bike_lo[1]), np.int32(bike_lo[2])
+    kh1, ks1, kv1 = np.int32(bike_hi[0]), np.int32(bike_hi[1]), np.int32(bike_hi[2])
+    half = np.int32(1 << (_HSV_SHIFT - 1))
+    for r in prange(rows):
+        for c in range(cols):
+            b = np.int32(bgr[r, c, 0])
+            g = np.int32(bgr[r, c, 1])
+            rd = np.int32(bgr[r, c, 2])
+            v = max(b, g, rd)
+            diff = v - min(b, g, rd)
+            s = (diff * sdiv[v] + half) >> _HSV_SHIFT
+            if v == rd:
+                h = g - b
+            elif v == g:
+                h = b - rd + 2 * diff
+            else:
+                h = rd - g + 4 * diff
+            h = (h * hdiv[diff] + half) >> _HSV_SHIFT
+            if h < 0:
+                h += 180
+            in_bus = (bh0 <= h) & (h <= bh1) & (bs0 <= s) & (s <= bs1) & (bv0 <= v) & (v <= bv1)
+            in_bike = (kh0 <= h) & (h <= kh1) & (ks0 <= s) & (s <= ks1) & (kv0 <= v) & (v <= kv1)
+            bus[r, c] = 255 if in_bus else 0
+            bike[r, c] = 255 if in_bike else 0
+    return bus, bike
+
+
+def segment_hsv_bands(
+    bgr: np.ndarray,
+    bus_lo: np.ndarray,
+    bus_hi: np.ndarray,
+    bike_lo: np.ndarray,
+    bike_hi: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Convert BGR to HSV and threshold both lane colors in a single pass.
+
+    Returns ``(bus_mask, bike_mask)`` as uint8 masks (0 / 255), identical
+    to ``cv2.inRange`` on ``cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)``.
+    """
+    bgr = np.ascontiguousarray(bgr)
+    with PARALLEL_LOCK:
+        return _segment(bgr, bus_lo, bus_hi, bike_lo, bike_hi, _SDIV, _HDIV)
@@ -0,0 +1,146 @@
+"""Numba-compiled point-in-polygon kernels for ZoneAnalyzer.
+
+Importing this module requires numba; callers fall back to the NumPy
+implementation when it is not installed or fails to compile.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit, prange
+
+from app.cv._numba_parallel import PARALLEL_LOCK
+
+
+# No fastmath: the boundary test needs ``side`` evaluated exactly as the
+# NumPy and Python paths do, without contraction or reassociation
+@njit(cache=True, inline="always")
+def _first_zone(
+    x: float,
+    y: float,
+    edges: np.ndarray,
+    poly_offsets: np.ndarray,
+    bboxes: np.ndarray,
+    cand_first: int,
+    cand_count: int,
+    cand_zones: np.ndarray,
+) -> int:
+    """First candidate polygon strictly containing ``(x, y)``, or -1."""
+    for c in range(cand_first, cand_first + cand_count):
+        z = cand_zones[c]
+        # Broad phase: four compares reject most zones
+        if x < bboxes[z, 0] or x > bboxes[z, 2] or y < bboxes[z, 1] or y > bboxes[z, 3]:
+            continue
+        inside = False
+        for k in range(poly_offsets[z], poly_offsets[z + 1]):
+            if edges[4, k] <= y <= edges[5, k]:
+                # Sign of the cross product says which side of the edge
+                # the point is on (0: on its line, no crossing); no
+                # division by the edge height
+                dy = edges[3, k]
+                side = edges[2, k] * (y - edges[1, k]) - (x - edges[0, k]) * dy
+                if side == 0 and edges[6, k] <= x <= edges[7, k]:
+                    # On the boundary: not in this zone
+                    inside = False
+                    break
+                if y < edges[5, k] and (side > 0 if dy > 0 else side < 0):
+                    inside = not inside
+        if inside:
+            return z
+    return -1
+
+
+@njit(cache=True, parallel=True)
+def _assign_zones(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    edges: np.ndarray,
+    poly_offsets: np.ndarray,
+    bboxes: np.ndarray,
+    cand_starts: np.ndarray,
+    cand_counts: np.ndarray,
+    cand_zones: np.ndarray,
+) -> np.ndarray:
+    """Index of the first polygon containing each point, or -1.
+
+    ``edges`` holds the rows ``(xi, yi, dx, dy, ymin, ymax, xmin, xmax)``
+    built at load time, one column per edge, packed CSR-style: polygon ``z`` owns columns
+    ``poly_offsets[z]:poly_offsets[z + 1]``; ``bboxes`` holds
+    each polygon's ``(minx, miny, maxx, maxy)``. Point ``i`` only tests
+    ``cand_zones[cand_starts[i]:cand_starts[i] + cand_counts[i]]``, its
+    broad-phase candidates in ascending zone order. Points are split across
+    threads and each stops at its first hit (crossing-number test).
+    """
+    out = np.empty(xs.size, dtype=np.intp)
+    for i in prange(xs.size):
+        out[i] = _first_zone(
+            xs[i], ys[i], edges, poly_offsets, bboxes,
+            cand_starts[i], cand_counts[i], cand_zones,
+        )
+    return out
+
+
+def assign_zones(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    edges: np.ndarray,
+    poly_offsets: np.ndarray,
+    bboxes: np.ndarray,
+    cand_starts: np.ndarray,
+    cand_counts: np.ndarray,
+    cand_zones: np.ndarray,
+) -> np.ndarray:
+    """Thread-safe entry point for the parallel ``_assign_zones`` kernel."""
+    with PARALLEL_LOCK:
+        return _assign_zones(
+            xs, ys, edges, poly_offsets, bboxes, cand_starts, cand_counts, cand_zones,
+        )
+
+
+@njit(cache=True)
+def assign_zones_serial(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    edges: np.ndarray,
+    poly_offsets: np.ndarray,
+    bboxes: np.ndarray,
+    cand_starts: np.ndarray,
+    cand_counts: np.ndarray,
+    cand_zones: np.ndarray,
+) -> np.ndarray:
+    """Single-threaded ``_assign_zones`` for batches too small to amortize
+    the thread pool dispatch."""
+    out = np.empty(xs.size, dtype=np.intp)
+    for i in range(xs.size):
+        out[i] = _first_zone(
+            xs[i], ys[i], edges, poly_offsets, bboxes,
+            cand_starts[i], cand_counts[i], cand_zones,
+        )
+    return out
+
+
+def _warmup() -> None:
+    # Load (or compile) the kernels at import instead of on the first request
+    # Edge table of the unit square, as built by ZoneAnalyzer.load_zones
+    edges = np.array([
+        [0.0, 1.0, 1.0, 0.0],
+        [0.0, 0.0, 1.0, 1.0],
+        [0.0, -1.0, 0.0, 1.0],
+        [1.0, 0.0, -1.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0],
+        [1.0, 0.0, 1.0, 1.0],
+        [0.0, 0.0, 1.0, 0.0],
+        [0.0, 1.0, 1.0, 1.0],
+    ])
+    args = (
+        np.array([0.5]), np.array([0.5]), edges,
+        np.array([0, 4], dtype=np.int64),
+        np.array([[0.0, 0.0, 1.0, 1.0]], dtype=np.float32),
+        np.array([0], dtype=np.int64), np.array([1], dtype=np.int64),
+        np.array([0], dtype=np.intp),
+    )
+    assign_zones(*args)
+    assign_zones_serial(*args)
+
+
+_warmup()
@@ -0,0 +1,15 @@
+"""Process-wide lock for launching parallel Numba kernels.
+
+Numba falls back to its ``workqueue`` threading layer when neither TBB nor
+OpenMP is available, and that layer aborts the whole process if two
+threads enter a parallel region at once. FastAPI and Streamlit both call
+the CV pipeline from worker threads, so every ``parallel=True`` kernel is
+launched under this lock. Each launch already spreads over all cores, so
+serializing them costs little throughput.
+"""
+
+from __future__ import annotations
+
+import threading
+
+PARALLEL_LOCK = threading.Lock()
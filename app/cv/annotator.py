@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import threading
+from functools import lru_cache
+
 import cv2
 import numpy as np
 
@@ -10,6 +13,9 @@ from app.schemas import (
     ZoneDefinition,
 )
 
+# Per-thread scratch frame for the zone fill overlay, reused across calls
+_SCRATCH = threading.local()
+
 # Zone fill colors (BGR)
 _ZONE_COLORS: dict[str, tuple[int, int, int]] = {
     "parking": (0, 200, 0),
@@ -37,32 +43,76 @@ _LABEL_COLORS: dict[str, tuple[int, int, int]] = {
 }
 
 
+@lru_cache(maxsize=512)
+def _text_size(text: str) -> tuple[int, int]:
+    """Pixel size of a detection label; font and scale are fixed."""
+    return cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)[0]
+
+
+def _zone_geometry(
+    zone: ZoneDefinition, coord_scale: float,
+) -> tuple[np.ndarray, int, int]:
+    """Return the zone's int32 contour in image pixels and its label anchor."""
+    pts = (np.asarray(zone.polygon, dtype=np.float64) / coord_scale).astype(np.int32)
+    # One sum + Python division is cheaper than two np.mean calls on a few points
+    sx, sy = pts.sum(axis=0).tolist()
+    cx = int(sx / len(pts))
+    cy = int(sy / len(pts))
+    return pts, cx, cy
+
+
+def _overlay_buffer(image: np.ndarray) -> np.ndarray:
+    """Return the scratch overlay filled with ``image``, reallocating on shape change."""
+    buf = getattr(_SCRATCH, "overlay", None)
+    if buf is None or buf.shape != image.shape or buf.dtype != image.dtype:
+        buf = image.copy()
+        _SCRATCH.overlay = buf
+    else:
+        np.copyto(buf, image)
+    return buf
+
+
 def draw_annotations(
     image: np.ndarray,
     detections: list[Detection],
     assignments: list[DetectionInZone],
-    decisions: list[LegalityDecision],
+    decisions: list[LegalityDecision] | dict[str, LegalityDecision],
     zones: list[ZoneDefinition],
+    coord_scale: float = 1.0,
 ) -> np.ndarray:
-    """Draw zone overlays, bounding boxes, and status labels on the image."""
+    """Draw zone overlays, bounding boxes, and status labels on the image.
+
+    ``decisions`` may already be keyed by track_id, which skips the lookup
+    rebuild here. ``coord_scale`` is the number of coordinate units per
+    image pixel, for frames decoded below their original resolution.
+    """
     annotated = image.copy()
 
     # Build a decision lookup by track_id
-    decision_map: dict[str, LegalityDecision] = {d.track_id: d for d in decisions}
+    if isinstance(decisions, dict):
+        decision_map = decisions
+    else:
+        decision_map = {d.track_id: d for d in decisions}
 
     # 1. Draw zone polygons with semi-transparent fill
-    overlay = annotated.copy()
+    overlay = _overlay_buffer(image)
+    outlines: dict[tuple[int, int, int], list[np.ndarray]] = {}
+    labels: list[tuple[str, int, int]] = []
     for zone in zones:
         if len(zone.polygon) < 3:
             continue
-        pts = np.array(zone.polygon, dtype=np.int32)
+        pts, cx, cy = _zone_geometry(zone, coord_scale)
         color = _ZONE_COLORS.get(zone.zone_type, (150, 150, 150))
+        # Fills stay per zone: a multi-contour fillPoly uses the even-odd
+        # rule and would punch holes where same-type zones overlap.
         cv2.fillPoly(overlay, [pts], color)
-        cv2.polylines(annotated, [pts], isClosed=True, color=color, thickness=2)
+        outlines.setdefault(color, []).append(pts)
+        labels.append((zone.label or zone.zone_type.replace("_", " ").title(), cx, cy))
 
-        cx = int(np.mean(pts[:, 0]))
-        cy = int(np.mean(pts[:, 1]))
-        label = zone.label or zone.zone_type.replace("_", " ").title()
+    # One polylines call per color instead of one per zone
+    for color, contours in outlines.items():
+        cv2.polylines(annotated, contours, isClosed=True, color=color, thickness=2)
+    for label, cx, cy in labels:
         cv2.putText(
             annotated, label, (cx - 40, cy),
             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2,
@@ -82,8 +132,8 @@ def draw_annotations(
         else:
             color = _STATUS_COLORS.get(status, (150, 150, 150))
 
-        x1, y1 = int(det.bbox.x1), int(det.bbox.y1)
-        x2, y2 = int(det.bbox.x2), int(det.bbox.y2)
+        x1, y1 = int(det.bbox.x1 / coord_scale), int(det.bbox.y1 / coord_scale)
+        x2, y2 = int(det.bbox.x2 / coord_scale), int(det.bbox.y2 / coord_scale)
 
         thickness = 2 if status != "in_transit" else 1
         cv2.rectangle(annotated, (x1, y1), (x2, y2), color, thickness)
@@ -100,7 +150,7 @@ def draw_annotations(
             parts.append("DOUBLE PARKED")
 
         text = " | ".join(parts)
-        text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)[0]
+        text_size = _text_size(text)
         cv2.rectangle(
             annotated, (x1, y1 - text_size[1] - 6), (x1 + text_size[0] + 4, y1),
             color, -1,
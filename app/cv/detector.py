@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import numpy as np
+import torch
 from ultralytics import YOLO
 
-from app.schemas import BoundingBox, Detection
+from app.schemas import (
+    BoundingBox,
+    DetectedClassId,
+    Detection,
+    DetectionBatch,
+)
 
 # COCO class IDs we detect
 _DETECT_CLASSES: dict[int, str] = {
@@ -15,10 +21,31 @@ _DETECT_CLASSES: dict[int, str] = {
     7: "truck",
 }
 
+# COCO class ID -> DetectedClassId
+_LABEL_ID_BY_CLASS = np.zeros(max(_DETECT_CLASSES) + 1, dtype=np.uint8)
+for _class_id, _label in _DETECT_CLASSES.items():
+    _LABEL_ID_BY_CLASS[_class_id] = DetectedClassId[_label]
+
 # Classification heuristics based on COCO label
 _COMMERCIAL_LABELS = {"truck", "bus"}
 _PRIVATE_LABELS = {"car", "motorcycle"}
 
+# Label string and classification per DetectedClassId, so the per-box loop
+# indexes tuples instead of testing label strings
+_LABEL_BY_ID: tuple[str, ...] = tuple(dc.name for dc in DetectedClassId)
+_CLASSIFICATION_BY_ID: tuple[str, ...] = tuple(
+    "commercial" if label in _COMMERCIAL_LABELS
+    else "private" if label in _PRIVATE_LABELS
+    else "unknown"
+    for label in _LABEL_BY_ID
+)
+
+# Precomputed detection IDs; frames rarely carry more boxes than this
+_DET_IDS: tuple[str, ...] = tuple(f"det_{i:04d}" for i in range(2048))
+
+# Fixed inference size so the backend can reuse one input shape
+_INFERENCE_SIZE = 640
+
 
 class VehicleDetector:
     """Wraps ultralytics YOLOv8 for vehicle, cyclist, and pedestrian detection.
@@ -35,45 +62,66 @@ class VehicleDetector:
         self.model = YOLO(model_name)
         self.confidence_threshold = confidence_threshold
 
-    def detect(self, image: np.ndarray) -> list[Detection]:
+        # FP16 only pays off on CUDA; CPU inference stays in FP32
+        self._half = torch.cuda.is_available()
+        self._device = 0 if self._half else "cpu"
+
+    def detect(self, image: np.ndarray, coord_scale: float = 1.0) -> list[Detection]:
         """Run YOLOv8 inference on a BGR numpy array.
 
         Returns Detection objects for vehicles, cyclists, and pedestrians.
+        Box coordinates are multiplied by ``coord_scale``, which maps a
+        reduced-resolution frame back to original pixel coordinates.
         """
-        results = self.model(image, conf=self.confidence_threshold, verbose=False)
-        detections: list[Detection] = []
-
-        for idx, box in enumerate(results[0].boxes):
-            class_id = int(box.cls[0])
-            if class_id not in _DETECT_CLASSES:
-                continue
-
-            label = _DETECT_CLASSES[class_id]
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().tolist()
-
-            # Bottom-center is a better ground-plane proxy than centroid
-            center_x = (x1 + x2) / 2
-            center_y = y2
-
-            # Classify as commercial / private / unknown
-            if label in _COMMERCIAL_LABELS:
-                classification = "commercial"
-            elif label in _PRIVATE_LABELS:
-                classification = "private"
-            else:
-                classification = "unknown"
+        return self.detect_batch(image, coord_scale).detections
+
+    def detect_batch(self, image: np.ndarray, coord_scale: float = 1.0) -> DetectionBatch:
+        """Like ``detect``, but also keeps the centers and labels as arrays."""
+        results = self.model(
+            image,
+            conf=self.confidence_threshold,
+            imgsz=_INFERENCE_SIZE,
+            device=self._device,
+            half=self._half,
+            verbose=False,
+        )
+        # Filter classes first so only surviving rows leave the device,
+        # then move each tensor to the host in one transfer
+        boxes = results[0].boxes
+        class_ids = boxes.cls.cpu().numpy().astype(np.int32)
+        keep = np.flatnonzero(np.isin(class_ids, list(_DETECT_CLASSES)))
+        if keep.size == 0:
+            return DetectionBatch.from_detections([])
+        keep_t = torch.from_numpy(keep).to(boxes.xyxy.device)
+        xyxy = boxes.xyxy[keep_t].cpu().numpy().astype(np.float64)
+        if coord_scale != 1.0:
+            xyxy *= coord_scale
+        confs = np.round(boxes.conf[keep_t].cpu().numpy().astype(np.float64), 3)
+
+        # Bottom-center is a better ground-plane proxy than centroid
+        center_x = (xyxy[:, 0] + xyxy[:, 2]) * 0.5
+        center_y = np.ascontiguousarray(xyxy[:, 3])
+        centers_x = center_x.tolist()
+        centers_y = center_y.tolist()
+        coords = xyxy.tolist()
+        confidences = confs.tolist()
+        label_ids = _LABEL_ID_BY_CLASS[class_ids[keep]]
 
+        detections: list[Detection] = []
+        for row, (idx, label_id) in enumerate(zip(keep.tolist(), label_ids.tolist())):
+            x1, y1, x2, y2 = coords[row]
             detections.append(
                 Detection(
-                    detection_id=f"det_{idx:04d}",
-                    label=label,
-                    confidence=round(float(box.conf[0]), 3),
+                    detection_id=_DET_IDS[idx] if idx < len(_DET_IDS) else f"det_{idx:04d}",
+                    label=_LABEL_BY_ID[label_id],
+                    confidence=confidences[row],
                     bbox=BoundingBox(x1=x1, y1=y1, x2=x2, y2=y2),
-                    center_x=center_x,
-                    center_y=center_y,
-                    classification=classification,
+                    center_x=centers_x[row],
+                    center_y=centers_y[row],
+                    # Commercial / private / unknown, by label
+                    classification=_CLASSIFICATION_BY_ID[label_id],
                     is_stationary=True,  # single-frame: assume stationary
                 )
             )
 
-        return detections
+        return DetectionBatch(detections, center_x, center_y, label_ids)
@@ -1,52 +1,296 @@
 from __future__ import annotations
 
-from shapely.geometry import Point, Polygon
+from typing import Literal, get_args
+
+import numpy as np
 
 from app.schemas import (
     COCO_TO_VEHICLE_TYPE,
     ZONE_TO_LANE_TYPE,
+    DetectedClassId,
     Detection,
+    DetectionBatch,
     DetectionInZone,
     VehicleObservation,
+    VehicleTypeId,
     ZoneDefinition,
+    ZoneType,
+)
+
+try:
+    from app.cv._geom_numba import assign_zones, assign_zones_serial
+except Exception:  # numba is optional; fall back to the NumPy kernel
+    # Not just ImportError: caching to a read-only directory or the
+    # import-time warmup compile can fail with other errors
+    assign_zones = assign_zones_serial = None
+
+# Below this many points the threaded kernel's dispatch costs more than it saves
+_PARALLEL_MIN_POINTS = 64
+
+# Up to this many (point, zone) pairs the plain-Python test beats the array
+# paths, whose fixed cost is ~15us (Numba) to ~20-50us (NumPy) per call
+_PYTHON_MAX_WORK = 256
+
+ZoneBackend = Literal["auto", "python", "numpy", "numba"]
+
+
+def _outward_float32(bounds: np.ndarray) -> np.ndarray:
+    """Round ``(minx, miny, maxx, maxy)`` rows to float32 without shrinking them.
+
+    Halves the broad-phase footprint; the exact edge test stays float64.
+    """
+    out = bounds.astype(np.float32)
+    lo, hi = out[:, :2], out[:, 2:]
+    lo[...] = np.where(lo > bounds[:, :2], np.nextafter(lo, np.float32(-np.inf)), lo)
+    hi[...] = np.where(hi < bounds[:, 2:], np.nextafter(hi, np.float32(np.inf)), hi)
+    return out
+
+
+def _polygon_edges(px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """Per-edge rows ``(xi, yi, dx, dy, ymin, ymax, xmin, xmax)`` for one polygon, shape (8, n).
+
+    Edge ``k`` runs from vertex ``k`` to vertex ``k - 1``, so the closing
+    edge is included and edges line up with the vertex arrays. Everything a
+    query needs besides the point itself is computed here, once per load.
+    """
+    xj = np.roll(px, 1)
+    yj = np.roll(py, 1)
+    return np.stack([
+        px, py, xj - px, yj - py,
+        np.minimum(py, yj), np.maximum(py, yj), np.minimum(px, xj), np.maximum(px, xj),
+    ])
+
+
+def _ray_cast(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    edges: np.ndarray,
+    edge_idx: np.ndarray,
+    starts: np.ndarray,
+) -> np.ndarray:
+    """Crossing-number test for many (point, polygon) pairs at once.
+
+    Each pair is expanded to one row per polygon edge: ``xs``/``ys`` hold
+    the pair's point and ``edge_idx`` the column of ``edges`` tested on
+    each row, and ``starts`` marks the first row of every pair. Returns one
+    bool per pair: strictly inside, so points on the boundary are False.
+    """
+    # Gathering each contiguous row separately beats one 2-D fancy index
+    xi, yi, dx, dy, ymin, ymax, xmin, xmax = (row[edge_idx] for row in edges)
+
+    # Edges that straddle each point's horizontal ray (horizontal edges never do)
+    cond = (ymin <= ys) & (ys < ymax)
+    # The ray crosses an upward edge when the point is strictly left of it and
+    # a downward edge when it is strictly right of it (Sunday's is-left test,
+    # no division); a point on the edge line (side == 0) crosses neither
+    side = dx * (ys - yi) - (xs - xi) * dy
+    crossings = cond & (side != 0) & ((side > 0) == (dy > 0))
+    # On the edge line and within its extent: the point is on the boundary
+    on_edge = (side == 0) & (ymin <= ys) & (ys <= ymax) & (xmin <= xs) & (xs <= xmax)
+    return np.logical_xor.reduceat(crossings, starts) & ~np.logical_or.reduceat(on_edge, starts)
+
+
+# Broad-phase grid for the NumPy path: 2**order cells per side over the zones' extent
+_GRID_ORDER = 6
+
+
+def _hilbert_index(cx: np.ndarray, cy: np.ndarray, order: int) -> np.ndarray:
+    """Position of integer cells ``(cx, cy)`` along a Hilbert curve on a 2**order grid.
+
+    Nearby cells get nearby keys, so the sorted cell table is walked with
+    good locality.
+    """
+    n = 1 << order
+    x = cx.astype(np.int64)
+    y = cy.astype(np.int64)
+    d = np.zeros_like(x)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the sub-curve has the canonical orientation
+        flip = rx & ~ry
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+
+# Hilbert key of every grid cell, indexed [cy, cx]
+_GRID_SIDE = 1 << _GRID_ORDER
+_HILBERT_KEYS = _hilbert_index(
+    np.tile(np.arange(_GRID_SIDE), _GRID_SIDE),
+    np.repeat(np.arange(_GRID_SIDE), _GRID_SIDE),
+    _GRID_ORDER,
+).reshape(_GRID_SIDE, _GRID_SIDE)
+
+
+# Vehicle type per DetectedClassId
+_VEHICLE_TYPE_BY_LABEL_ID: tuple[str, ...] = tuple(
+    COCO_TO_VEHICLE_TYPE.get(dc.name, "other") for dc in DetectedClassId
 )
 
+_NO_ZONE: tuple[ZoneDefinition | None, str, bool] = (None, "unknown", False)
+
+# Dense zone-type ordinals; the extra last id stands for "no zone"
+_ZONE_TYPE_ID: dict[str, int] = {zt: i for i, zt in enumerate(get_args(ZoneType))}
+_NO_ZONE_TYPE_ID = len(_ZONE_TYPE_ID)
+
+# is_double_parked per zone type id
+_DOUBLE_PARKED = np.zeros(_NO_ZONE_TYPE_ID + 1, dtype=bool)
+_DOUBLE_PARKED[_ZONE_TYPE_ID["double_parking"]] = True
+
+# is_obstructing per (vehicle type id, zone type id): anything but a bus or
+# bike standing in a bus lane, bike lane or hydrant zone
+_OBSTRUCTS = np.zeros((len(VehicleTypeId), _NO_ZONE_TYPE_ID + 1), dtype=bool)
+_OBSTRUCTS[:, [_ZONE_TYPE_ID[zt] for zt in ("bus_lane", "bike_lane", "fire_hydrant")]] = True
+_OBSTRUCTS[[VehicleTypeId.bus, VehicleTypeId.bike], :] = False
+
 
 class ZoneAnalyzer:
     """Maps vehicle detections to user-defined and auto-detected zones.
 
-    Uses Shapely point-in-polygon tests.
+    Detections are assigned by a ray-casting test. Small batches run it in
+    plain Python; larger ones use the candidates of a Hilbert-keyed cell
+    index with a Numba-compiled kernel when available, NumPy otherwise.
+    ``backend`` pins one implementation (tests use this to cover all three).
+
+    Every path uses Shapely's ``contains`` rule: a zone holds only points
+    strictly inside it. A point on a zone's edge or vertex is not in that
+    zone and goes to the next zone (in load order) that strictly contains
+    it, or to none.
     """
 
-    def __init__(self) -> None:
-        self._zone_polygons: list[tuple[ZoneDefinition, Polygon]] = []
+    def __init__(self, backend: ZoneBackend = "auto") -> None:
+        if backend == "numba" and assign_zones is None:
+            raise ValueError("the numba backend requires numba to be installed")
+        self._backend = backend
+        self._zones: list[ZoneDefinition] = []
+        self._zone_vertices: list[tuple[np.ndarray, np.ndarray]] = []
+        # (zone, lane_type, is_in_transit) per zone index; the trailing
+        # entry is the no-zone result, so index -1 selects it
+        self._zone_info: list[tuple[ZoneDefinition | None, str, bool]] = [_NO_ZONE]
+        # (n_zones, 4) axis-aligned bounds: minx, miny, maxx, maxy (float32,
+        # rounded outward so the broad phase never rejects a true hit)
+        self._bboxes: np.ndarray = np.empty((0, 4), dtype=np.float32)
+        # Precomputed edge table of all zones, (8, n_edges), packed CSR-style:
+        # zone ``z`` owns columns ``_poly_offsets[z]:_poly_offsets[z + 1]``
+        self._edges: np.ndarray = np.empty((8, 0), dtype=np.float64)
+        self._poly_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        # The same bounds and edge rows as Python tuples, for the scalar path
+        self._zone_tests: list[tuple[tuple[float, ...], list[tuple[float, ...]]]] = []
+        # Hilbert-keyed grid: sorted occupied cell keys, CSR offsets into
+        # ``_cell_zones`` (zone indices overlapping each cell, ascending)
+        self._grid_origin = (0.0, 0.0)
+        self._grid_step = 1.0
+        self._cell_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self._cell_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self._cell_zones: np.ndarray = np.empty(0, dtype=np.intp)
 
     def load_zones(self, zones: list[ZoneDefinition]) -> None:
-        """Convert ZoneDefinition list to Shapely Polygon objects."""
-        self._zone_polygons = [
-            (z, Polygon(z.polygon)) for z in zones if len(z.polygon) >= 3
+        """Convert ZoneDefinition list to vertex arrays, edge tables and bounds."""
+        self._zones = [z for z in zones if len(z.polygon) >= 3]
+        self._zone_vertices = []
+        self._zone_info = [
+            (
+                z,
+                ZONE_TO_LANE_TYPE.get(z.zone_type, "unknown"),
+                # Vehicles in a travel lane are moving — flag as in_transit
+                z.zone_type == "travel_lane",
+            )
+            for z in self._zones
+        ]
+        self._zone_info.append(_NO_ZONE)
+        for z in self._zones:
+            verts = np.asarray(z.polygon, dtype=np.float64)
+            self._zone_vertices.append((verts[:, 0].copy(), verts[:, 1].copy()))
+
+        self._edges = np.concatenate(
+            [np.empty((8, 0)), *(_polygon_edges(px, py) for px, py in self._zone_vertices)],
+            axis=1,
+        )
+        self._poly_offsets = np.zeros(len(self._zone_vertices) + 1, dtype=np.int64)
+        np.cumsum([px.size for px, _ in self._zone_vertices], out=self._poly_offsets[1:])
+        # Edge rows 0 and 1 hold every vertex, so bounds are segment reductions
+        first = self._poly_offsets[:-1]
+        self._bboxes = _outward_float32(np.column_stack([
+            np.minimum.reduceat(self._edges[0], first),
+            np.minimum.reduceat(self._edges[1], first),
+            np.maximum.reduceat(self._edges[0], first),
+            np.maximum.reduceat(self._edges[1], first),
+        ]).reshape(-1, 4))
+        edge_rows = [tuple(row) for row in self._edges.T.tolist()]
+        self._zone_tests = [
+            (tuple(bbox), edge_rows[start:end])
+            for bbox, start, end in zip(
+                self._bboxes.tolist(), self._poly_offsets[:-1].tolist(), self._poly_offsets[1:].tolist(),
+            )
         ]
+        self._build_cell_index()
+
+    def _build_cell_index(self) -> None:
+        """Register every zone under the grid cells its bbox overlaps."""
+        if not self._zones:
+            self._cell_ids = np.empty(0, dtype=np.int64)
+            self._cell_offsets = np.zeros(1, dtype=np.int64)
+            self._cell_zones = np.empty(0, dtype=np.intp)
+            return
+
+        bb = self._bboxes
+        self._grid_origin = (float(bb[:, 0].min()), float(bb[:, 1].min()))
+        extent = max(bb[:, 2].max() - self._grid_origin[0], bb[:, 3].max() - self._grid_origin[1])
+        self._grid_step = float(extent) / _GRID_SIDE or 1.0
+
+        lo_x, lo_y = self._grid_cells(bb[:, 0], bb[:, 1])
+        hi_x, hi_y = self._grid_cells(bb[:, 2], bb[:, 3])
+        keys, owners = [], []
+        for z in range(len(bb)):
+            gx, gy = np.meshgrid(
+                np.arange(lo_x[z], hi_x[z] + 1), np.arange(lo_y[z], hi_y[z] + 1),
+            )
+            keys.append(_HILBERT_KEYS[gy.ravel(), gx.ravel()])
+            owners.append(np.full(gx.size, z, dtype=np.intp))
+        keys_arr = np.concatenate(keys)
+        owners_arr = np.concatenate(owners)
+
+        # Sort by cell key, then zone index so each cell lists zones in load order
+        order = np.lexsort((owners_arr, keys_arr))
+        keys_arr = keys_arr[order]
+        self._cell_zones = owners_arr[order]
+        self._cell_ids, starts = np.unique(keys_arr, return_index=True)
+        self._cell_offsets = np.append(starts, keys_arr.size).astype(np.int64)
+
+    def _grid_cells(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Integer grid cell of each point, clamped to the grid."""
+        last = _GRID_SIDE - 1
+        x0, y0 = self._grid_origin
+        cx = np.clip(np.floor((xs - x0) / self._grid_step), 0, last).astype(np.int64)
+        cy = np.clip(np.floor((ys - y0) / self._grid_step), 0, last).astype(np.int64)
+        return cx, cy
 
     def assign_detections_to_zones(
-        self, detections: list[Detection]
+        self, detections: list[Detection] | DetectionBatch
     ) -> list[DetectionInZone]:
-        """For each detection, find which zone its ground point falls within."""
-        results: list[DetectionInZone] = []
-        for det in detections:
-            zone = self._find_zone(det.center_x, det.center_y)
-            vehicle_type = COCO_TO_VEHICLE_TYPE.get(det.label, "other")
-            lane_type = ZONE_TO_LANE_TYPE.get(zone.zone_type, "unknown") if zone else "unknown"
+        """For each detection, find which zone its ground point falls within.
 
-            # Vehicles in a travel lane are moving — flag as in_transit
-            is_in_transit = (zone is not None and zone.zone_type == "travel_lane")
+        Accepts a ``DetectionBatch`` (e.g. from ``VehicleDetector.detect_batch``)
+        to reuse its coordinate arrays; a plain list is packed once.
+        """
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_detections(detections)
+        zone_indices = self._zone_indices(detections.center_x, detections.center_y)
 
+        zone_info = self._zone_info
+        results: list[DetectionInZone] = []
+        for det, zone_idx, label_id in zip(
+            detections.detections, zone_indices.tolist(), detections.label_ids.tolist(),
+        ):
+            zone, lane_type, is_in_transit = zone_info[zone_idx]
             results.append(
                 DetectionInZone(
-                    detection=det,
-                    zone=zone,
-                    vehicle_type=vehicle_type,
-                    lane_type=lane_type,
-                    is_in_transit=is_in_transit,
+                    det, zone, _VEHICLE_TYPE_BY_LABEL_ID[label_id], lane_type, is_in_transit,
                 )
             )
         return results
@@ -59,29 +303,129 @@ class ZoneAnalyzer:
         Travel-lane vehicles are included but the rules engine will
         mark them as in_transit rather than evaluating legality.
         """
+        n = len(assignments)
+        zone_type_ids = np.fromiter(
+            (_ZONE_TYPE_ID[a.zone.zone_type] if a.zone else _NO_ZONE_TYPE_ID for a in assignments),
+            dtype=np.intp, count=n,
+        )
+        vehicle_type_ids = np.fromiter(
+            (VehicleTypeId[a.vehicle_type] for a in assignments), dtype=np.intp, count=n,
+        )
+        # Both flags are table lookups over the whole batch
+        double_parked = _DOUBLE_PARKED[zone_type_ids].tolist()
+        obstructing = _OBSTRUCTS[vehicle_type_ids, zone_type_ids].tolist()
+
         observations: list[VehicleObservation] = []
-        for a in assignments:
-            zone_type = a.zone.zone_type if a.zone else None
+        for a, is_double_parked, is_obstructing in zip(
+            assignments, double_parked, obstructing, strict=True,
+        ):
             observations.append(
                 VehicleObservation(
                     track_id=a.detection.detection_id,
                     vehicle_type=a.vehicle_type,
                     lane_type=a.lane_type,
-                    is_double_parked=(zone_type == "double_parking"),
-                    is_obstructing=(
-                        zone_type in ("bus_lane", "bike_lane", "fire_hydrant")
-                        and a.vehicle_type not in ("bus", "bike")
-                    ),
+                    is_double_parked=is_double_parked,
+                    is_obstructing=is_obstructing,
                     curb_distance_m=0.0,
                     dwell_time_seconds=0,
                 )
             )
         return observations
 
-    def _find_zone(self, x: float, y: float) -> ZoneDefinition | None:
-        """Return the first zone whose polygon contains the point."""
-        point = Point(x, y)
-        for zone_def, shapely_poly in self._zone_polygons:
-            if shapely_poly.contains(point):
-                return zone_def
-        return None
+    def _zone_indices(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return the index of the first zone containing each point, or -1."""
+        if not self._zone_vertices or xs.size == 0:
+            return np.full(xs.size, -1, dtype=np.intp)
+
+        backend = self._backend
+        if backend == "auto":
+            if xs.size * len(self._zone_tests) <= _PYTHON_MAX_WORK:
+                backend = "python"
+            else:
+                backend = "numpy" if assign_zones is None else "numba"
+
+        if backend == "python":
+            return self._zone_indices_python(xs, ys)
+        if backend == "numpy":
+            return self._zone_indices_numpy(xs, ys)
+
+        starts, counts = self._cell_candidates(xs, ys)
+        kernel = assign_zones if xs.size >= _PARALLEL_MIN_POINTS else assign_zones_serial
+        return kernel(
+            xs, ys, self._edges, self._poly_offsets, self._bboxes,
+            starts, counts, self._cell_zones,
+        )
+
+    def _zone_indices_python(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Scalar version of the kernels' bbox reject and crossing test."""
+        result: list[int] = []
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            hit = -1
+            for z, ((minx, miny, maxx, maxy), edges) in enumerate(self._zone_tests):
+                if x < minx or x > maxx or y < miny or y > maxy:
+                    continue
+                inside = False
+                for xi, yi, dx, dy, ymin, ymax, xmin, xmax in edges:
+                    if ymin <= y <= ymax:
+                        side = dx * (y - yi) - (x - xi) * dy
+                        if side == 0 and xmin <= x <= xmax:
+                            # On the boundary: not in this zone
+                            inside = False
+                            break
+                        if y < ymax and (side > 0 if dy > 0 else side < 0):
+                            inside = not inside
+                if inside:
+                    hit = z
+                    break
+            result.append(hit)
+        return np.array(result, dtype=np.intp)
+
+    def _cell_candidates(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Broad phase: each point's slice ``(start, count)`` of ``_cell_zones``.
+
+        Points in a cell no zone overlaps get an empty slice.
+        """
+        cx, cy = self._grid_cells(xs, ys)
+        keys = _HILBERT_KEYS[cy, cx]
+        pos = np.minimum(np.searchsorted(self._cell_ids, keys), self._cell_ids.size - 1)
+        found = self._cell_ids[pos] == keys
+        starts = np.where(found, self._cell_offsets[pos], 0)
+        counts = np.where(found, self._cell_offsets[pos + 1] - self._cell_offsets[pos], 0)
+        return starts, counts
+
+    def _zone_indices_numpy(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """NumPy fallback for the compiled kernel, pruned by the cell index.
+
+        Candidates are tested in rounds: round ``r`` tries each still
+        unassigned point's ``r``-th candidate zone, so a point stops paying
+        for zones as soon as one contains it.
+        """
+        starts, counts = self._cell_candidates(xs, ys)
+        result = np.full(xs.size, -1, dtype=np.intp)
+        zone_edges = np.diff(self._poly_offsets)
+        bb = self._bboxes
+
+        pts = np.flatnonzero(counts)
+        rank = 0
+        while pts.size:
+            zone = self._cell_zones[starts[pts] + rank]
+            px = xs[pts]
+            py = ys[pts]
+            box = bb[zone]
+            keep = (px >= box[:, 0]) & (px <= box[:, 2]) & (py >= box[:, 1]) & (py <= box[:, 3])
+            tested = pts[keep]
+            if tested.size:
+                zone = zone[keep]
+                # Narrow phase: one row per (point, edge) of this round's pairs
+                n_edges = zone_edges[zone]
+                first = np.cumsum(n_edges) - n_edges
+                edge_idx = np.arange(n_edges.sum()) + np.repeat(
+                    self._poly_offsets[zone] - first, n_edges,
+                )
+                rows = np.repeat(tested, n_edges)
+                inside = _ray_cast(xs[rows], ys[rows], self._edges, edge_idx, first)
+                result[tested[inside]] = zone[inside]
+            rank += 1
+            # Early exit: drop assigned points and those out of candidates
+            pts = pts[(result[pts] < 0) & (counts[pts] > rank)]
+        return result
@@ -2,13 +2,12 @@ from __future__ import annotations
 
 import base64
 
-import cv2
-import numpy as np
 from fastapi import FastAPI, File, Form, UploadFile
 
 from app.analytics import occupancy_rate, summarize_decisions
 from app.cv.annotator import draw_annotations
 from app.cv.detector import VehicleDetector
+from app.cv.image_io import decode_image, encode_jpeg
 from app.cv.lane_detector import LaneDetector
 from app.cv.zone_analyzer import ZoneAnalyzer
 from app.rules_engine import RulesEngine
@@ -41,8 +40,8 @@ def health() -> dict[str, str]:
 
 @app.post("/analyze", response_model=AnalyzeResponse)
 def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
-    decisions = [rules_engine.evaluate(request.frame, obs) for obs in request.observations]
-    return AnalyzeResponse(
+    decisions = rules_engine.evaluate_batch(request.frame, request.observations)
+    return AnalyzeResponse.model_construct(
         frame_id=request.frame.frame_id,
         occupancy_rate=occupancy_rate(request.observations),
         decisions=decisions,
@@ -69,44 +68,46 @@ async def analyze_image(
     # 1. Parse request
     request = ImageAnalyzeRequest.model_validate_json(request_json)
 
-    # 2. Decode image
+    # 2. Decode image (large uploads at reduced resolution)
     image_bytes = await image.read()
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    cv_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    h, w = cv_image.shape[:2]
+    cv_image, w, h = decode_image(image_bytes)
+    coord_scale = w / cv_image.shape[1]
 
     # 3. Detect vehicles
-    detections = vehicle_detector.detect(cv_image)
+    batch = vehicle_detector.detect_batch(cv_image, coord_scale)
+    detections = batch.detections
 
     # 4. Auto-detect bus/bike lanes from paint color
-    auto_zones = lane_detector.detect_lanes(cv_image)
+    auto_zones = lane_detector.detect_lanes(cv_image, coord_scale)
 
     # 5. Combine user zones (priority) with auto-detected zones
     all_zones = list(request.zones) + auto_zones
     zone_analyzer.load_zones(all_zones)
 
     # 6. Assign detections to zones
-    assignments = zone_analyzer.assign_detections_to_zones(detections)
+    assignments = zone_analyzer.assign_detections_to_zones(batch)
 
     # 7. Bridge to existing rules engine
     observations = zone_analyzer.detections_to_observations(assignments)
-    decisions = [
-        rules_engine.evaluate_with_zone(
-            request.frame, obs, assignment.zone, assignment.is_in_transit,
-        )
-        for obs, assignment in zip(observations, assignments)
-    ]
+    decisions = rules_engine.evaluate_batch_with_zone(
+        request.frame,
+        observations,
+        [a.zone for a in assignments],
+        [a.is_in_transit for a in assignments],
+    )
 
     # 8. Analytics
     occ = occupancy_rate(observations)
     summary = summarize_decisions(decisions)
 
     # 9. Annotate image
-    annotated = draw_annotations(cv_image, detections, assignments, decisions, all_zones)
-    _, buffer = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, 85])
-    annotated_b64 = base64.b64encode(buffer).decode("utf-8")
+    decision_map = {d.track_id: d for d in decisions}
+    annotated = draw_annotations(
+        cv_image, detections, assignments, decision_map, all_zones, coord_scale,
+    )
+    annotated_b64 = base64.b64encode(encode_jpeg(annotated, quality=85)).decode("utf-8")
 
-    return ImageAnalyzeResponse(
+    return ImageAnalyzeResponse.model_construct(
         frame_id=request.frame.frame_id,
         image_width=w,
         image_height=h,
@@ -123,6 +124,5 @@ async def analyze_image(
 async def detect_only(image: UploadFile = File(...)) -> list[Detection]:
     """Run vehicle detection only — no zones or legality analysis."""
     image_bytes = await image.read()
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    cv_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    return vehicle_detector.detect(cv_image)
+    cv_image, w, _ = decode_image(image_bytes)
+    return vehicle_detector.detect(cv_image, w / cv_image.shape[1])
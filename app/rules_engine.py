@@ -1,62 +1,213 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
 import yaml
 
-from app.schemas import FrameContext, LegalityDecision, VehicleObservation, ZoneDefinition
+from app.schemas import (
+    VEHICLE_TYPE_ID,
+    FrameContext,
+    LegalityDecision,
+    VehicleObservation,
+    VehicleTypeId,
+    ZoneDefinition,
+)
+
+# libyaml's C loader is several times faster than the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@lru_cache(maxsize=32)
+def _load_rules_cached(path: str, mtime: float) -> dict:
+    """Parse a rules file once per (path, mtime); edits invalidate the entry.
+
+    The returned dict is shared between engines and must not be mutated.
+    """
+    if mtime < 0:
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return yaml.load(file, Loader=_YAML_LOADER) or {}
+
+
+_DEFAULT_DWELL_LIMIT = 900
+
+# Violation categories collected alongside reason codes; status is derived
+# from the combined mask in a single pass.
+_SEVERE = 1
+_OCCUPIED = 2
+_OTHER = 4
+
+
+def _is_overnight(frame: FrameContext) -> bool:
+    hour = frame.timestamp_utc.hour
+    return hour >= 0 and hour < 6
+
+
+def _codes_to_status(mask: int) -> tuple[str, float]:
+    if mask & _SEVERE:
+        return "likely_illegal", 0.92
+    if mask & _OCCUPIED:
+        return "likely_illegal", 0.88
+    if mask:
+        return "uncertain", 0.75
+    return "legal", 0.95
+
+
+# Per-observation condition bits used by evaluate_batch, in the order
+# evaluate() emits their reason codes.
+_BATCH_RULES = (
+    ("double_parking_detected", _SEVERE),
+    ("critical_obstruction", _SEVERE),
+    ("bus_lane_occupied", _OCCUPIED),
+    ("bike_lane_occupied", _OCCUPIED),
+    ("dwell_time_exceeded", _OTHER),
+    ("overnight_commercial_restriction", _OTHER),
+)
+_LANE_BITS = {"bus": 1 << 2, "bike": 1 << 3}
+# Shared code strings; formatting them per call would allocate a new str each time
+_LANE_OCCUPIED_CODES = {"bus": "bus_lane_occupied", "bike": "bike_lane_occupied"}
+
+
+def _batch_table() -> tuple[tuple[tuple[str, ...], str, float], ...]:
+    table = []
+    for bits in range(1 << len(_BATCH_RULES)):
+        codes = tuple(code for i, (code, _) in enumerate(_BATCH_RULES) if bits >> i & 1)
+        mask = 0
+        for i, (_, category) in enumerate(_BATCH_RULES):
+            if bits >> i & 1:
+                mask |= category
+        table.append((codes, *_codes_to_status(mask)))
+    return tuple(table)
+
+
+# Reason codes, status and confidence for every combination of condition bits
+_BATCH_TABLE = _batch_table()
 
 
 class RulesEngine:
     def __init__(self, rules_path: str = "config/nyc_parking_rules.yaml") -> None:
         self.rules_path = Path(rules_path)
         self.rules = self._load_rules()
+        # Dwell-limit LUT indexed by VehicleTypeId ordinal, for the batch path
+        self._dwell_limit_array = np.full(len(VehicleTypeId), _DEFAULT_DWELL_LIMIT, dtype=np.int32)
+        for vehicle_type, limit in self.rules.get("dwell_time_limits", {}).items():
+            if vehicle_type in VEHICLE_TYPE_ID:
+                self._dwell_limit_array[VEHICLE_TYPE_ID[vehicle_type]] = limit
+        # Same limits keyed by name; a dict hit beats NumPy scalar indexing per call
+        self._dwell_limits: dict[str, int] = dict(
+            zip(VEHICLE_TYPE_ID, self._dwell_limit_array.tolist())
+        )
 
     def _load_rules(self) -> dict:
-        if not self.rules_path.exists():
-            return {}
-        with self.rules_path.open("r", encoding="utf-8") as file:
-            return yaml.safe_load(file) or {}
+        try:
+            mtime = self.rules_path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = -1.0
+        return _load_rules_cached(str(self.rules_path), mtime)
 
-    def evaluate(self, frame: FrameContext, observation: VehicleObservation) -> LegalityDecision:
+    def _collect_codes(
+        self,
+        overnight: bool,
+        observation: VehicleObservation,
+        zone: ZoneDefinition | None,
+    ) -> tuple[list[str], int]:
         reason_codes: list[str] = []
-        confidence = 0.9
-
-        dwell_limit = self.rules.get("dwell_time_limits", {}).get(observation.vehicle_type, 900)
+        mask = 0
 
         if observation.is_double_parked:
             reason_codes.append("double_parking_detected")
+            mask |= _SEVERE
         if observation.is_obstructing:
             reason_codes.append("critical_obstruction")
-        if observation.lane_type in ("bus", "bike"):
-            reason_codes.append(f"{observation.lane_type}_lane_occupied")
-        if observation.dwell_time_seconds > dwell_limit:
+            mask |= _SEVERE
+        lane_code = _LANE_OCCUPIED_CODES.get(observation.lane_type)
+        if lane_code is not None:
+            reason_codes.append(lane_code)
+            mask |= _OCCUPIED
+        if observation.dwell_time_seconds > self._dwell_limits.get(
+            observation.vehicle_type, _DEFAULT_DWELL_LIMIT
+        ):
             reason_codes.append("dwell_time_exceeded")
+            mask |= _OTHER
 
-        overnight = frame.timestamp_utc.hour >= 0 and frame.timestamp_utc.hour < 6
         if overnight and observation.vehicle_type == "commercial":
             reason_codes.append("overnight_commercial_restriction")
+            mask |= _OTHER
+
+        if zone is None:
+            return reason_codes, mask
+
+        # Zone-specific rules
+        zone_type = zone.zone_type
+        if zone_type == "no_parking":
+            reason_codes.append("no_parking_zone_violation")
+            mask |= _SEVERE
+        elif zone_type == "fire_hydrant":
+            reason_codes.append("fire_hydrant_zone_violation")
+            mask |= _SEVERE
+        elif zone_type == "bus_lane" and observation.vehicle_type != "bus":
+            if observation.lane_type != "bus":
+                reason_codes.append("bus_lane_occupied")
+            mask |= _OCCUPIED
+        elif zone_type == "bike_lane" and observation.vehicle_type != "bike":
+            if observation.lane_type != "bike":
+                reason_codes.append("bike_lane_occupied")
+            mask |= _OCCUPIED
+        elif zone_type == "loading_zone" and observation.vehicle_type == "passenger":
+            if observation.dwell_time_seconds > self._dwell_limits["passenger"]:
+                reason_codes.append("loading_zone_passenger_overstay")
+                mask |= _OTHER
+
+        return reason_codes, mask
 
-        if not reason_codes:
-            status = "legal"
-            confidence = 0.95
-        elif "critical_obstruction" in reason_codes or "double_parking_detected" in reason_codes:
-            status = "likely_illegal"
-            confidence = 0.92
-        elif any(code.endswith("lane_occupied") for code in reason_codes):
-            status = "likely_illegal"
-            confidence = 0.88
-        else:
-            status = "uncertain"
-            confidence = 0.75
-
-        return LegalityDecision(
+    def evaluate(self, frame: FrameContext, observation: VehicleObservation) -> LegalityDecision:
+        reason_codes, mask = self._collect_codes(_is_overnight(frame), observation, None)
+        status, confidence = _codes_to_status(mask)
+        # Every field is engine-built and already valid; skip re-validation
+        return LegalityDecision.model_construct(
             track_id=observation.track_id,
             status=status,
             reason_codes=reason_codes,
             confidence=confidence,
         )
 
+    def evaluate_batch(
+        self, frame: FrameContext, observations: list[VehicleObservation]
+    ) -> list[LegalityDecision]:
+        """Vectorized ``evaluate`` over a list of observations.
+
+        The condition checks are packed into a per-row bit pattern with
+        NumPy; codes and status then come from a precomputed table.
+        """
+        n = len(observations)
+        if n == 0:
+            return []
+
+        vt = np.fromiter((VEHICLE_TYPE_ID[o.vehicle_type] for o in observations), np.int8, n)
+        dwell = np.fromiter((o.dwell_time_seconds for o in observations), np.int64, n)
+        bits = np.fromiter((o.is_double_parked for o in observations), np.uint8, n)
+        bits |= np.fromiter((o.is_obstructing for o in observations), np.uint8, n) << 1
+        bits |= np.fromiter((_LANE_BITS.get(o.lane_type, 0) for o in observations), np.uint8, n)
+        bits |= (dwell > self._dwell_limit_array[vt]).astype(np.uint8) << 4
+
+        if _is_overnight(frame):
+            bits |= (vt == VehicleTypeId.commercial).astype(np.uint8) << 5
+
+        decisions = []
+        for observation, row in zip(observations, bits.tolist()):
+            codes, status, confidence = _BATCH_TABLE[row]
+            decisions.append(
+                LegalityDecision.model_construct(
+                    track_id=observation.track_id,
+                    status=status,
+                    reason_codes=list(codes),
+                    confidence=confidence,
+                )
+            )
+        return decisions
+
     def evaluate_with_zone(
         self,
         frame: FrameContext,
@@ -69,60 +220,45 @@ class RulesEngine:
         Vehicles in a travel lane (is_in_transit=True) are assumed to be
         moving and receive status ``in_transit`` with no legality evaluation.
         """
+        return self._evaluate_one(_is_overnight(frame), observation, zone, is_in_transit)
+
+    def evaluate_batch_with_zone(
+        self,
+        frame: FrameContext,
+        observations: list[VehicleObservation],
+        zones: list[ZoneDefinition | None],
+        is_in_transit: list[bool],
+    ) -> list[LegalityDecision]:
+        """``evaluate_with_zone`` over parallel lists sharing one frame.
+
+        Frame-level invariants are computed once instead of per observation.
+        """
+        overnight = _is_overnight(frame)
+        evaluate_one = self._evaluate_one
+        return [
+            evaluate_one(overnight, obs, zone, in_transit)
+            for obs, zone, in_transit in zip(observations, zones, is_in_transit)
+        ]
+
+    def _evaluate_one(
+        self,
+        overnight: bool,
+        observation: VehicleObservation,
+        zone: ZoneDefinition | None,
+        is_in_transit: bool,
+    ) -> LegalityDecision:
         # Travel lane → skip legality entirely
         if is_in_transit or (zone is not None and zone.zone_type == "travel_lane"):
-            return LegalityDecision(
+            return LegalityDecision.model_construct(
                 track_id=observation.track_id,
                 status="in_transit",
                 reason_codes=[],
                 confidence=1.0,
             )
 
-        decision = self.evaluate(frame, observation)
-        reason_codes = list(decision.reason_codes)
-
-        if zone is None:
-            return decision
-
-        # Zone-specific rules
-        if zone.zone_type == "no_parking":
-            reason_codes.append("no_parking_zone_violation")
-        if zone.zone_type == "fire_hydrant":
-            reason_codes.append("fire_hydrant_zone_violation")
-        if zone.zone_type == "bus_lane" and observation.vehicle_type != "bus":
-            if "bus_lane_occupied" not in reason_codes:
-                reason_codes.append("bus_lane_occupied")
-        if zone.zone_type == "bike_lane" and observation.vehicle_type != "bike":
-            if "bike_lane_occupied" not in reason_codes:
-                reason_codes.append("bike_lane_occupied")
-        if zone.zone_type == "loading_zone" and observation.vehicle_type == "passenger":
-            dwell_limit = self.rules.get("dwell_time_limits", {}).get("passenger", 900)
-            if observation.dwell_time_seconds > dwell_limit:
-                reason_codes.append("loading_zone_passenger_overstay")
-
-        # Re-derive status from full set of reason codes
-        if not reason_codes:
-            status: str = "legal"
-            confidence = 0.95
-        elif any(
-            code in reason_codes
-            for code in (
-                "fire_hydrant_zone_violation",
-                "no_parking_zone_violation",
-                "double_parking_detected",
-                "critical_obstruction",
-            )
-        ):
-            status = "likely_illegal"
-            confidence = 0.92
-        elif any(code.endswith("_occupied") for code in reason_codes):
-            status = "likely_illegal"
-            confidence = 0.88
-        else:
-            status = "uncertain"
-            confidence = 0.75
-
-        return LegalityDecision(
+        reason_codes, mask = self._collect_codes(overnight, observation, zone)
+        status, confidence = _codes_to_status(mask)
+        return LegalityDecision.model_construct(
             track_id=observation.track_id,
             status=status,
             reason_codes=reason_codes,
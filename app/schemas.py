@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
+from enum import IntEnum
 from typing import Literal
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field
 
 VehicleType = Literal["passenger", "commercial", "bus", "bike", "scooter", "other"]
 LaneType = Literal["travel", "bus", "bike", "parking", "unknown"]
@@ -17,6 +20,24 @@ DetectedClass = Literal[
 VehicleClassification = Literal["commercial", "private", "municipal", "unknown"]
 
 
+class VehicleTypeId(IntEnum):
+    """Dense ordinals for ``VehicleType``, for array-indexed lookups.
+
+    Member names equal the wire strings, so ``VehicleTypeId[vehicle_type]``
+    maps a validated model field to its ordinal. The API keeps the string
+    ``Literal`` types.
+    """
+    passenger = 0
+    commercial = 1
+    bus = 2
+    bike = 3
+    scooter = 4
+    other = 5
+
+
+VEHICLE_TYPE_ID: dict[str, int] = {vt.name: vt.value for vt in VehicleTypeId}
+
+
 class FrameContext(BaseModel):
     frame_id: str
     camera_id: str
@@ -26,6 +47,8 @@ class FrameContext(BaseModel):
 
 
 class VehicleObservation(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     track_id: str
     vehicle_type: VehicleType
     lane_type: LaneType
@@ -41,6 +64,8 @@ class AnalyzeRequest(BaseModel):
 
 
 class LegalityDecision(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     track_id: str
     status: Literal["legal", "likely_illegal", "uncertain", "in_transit"]
     reason_codes: list[str]
@@ -58,7 +83,12 @@ class AnalyzeResponse(BaseModel):
 # CV-related models
 # ---------------------------------------------------------------------------
 
-class BoundingBox(BaseModel):
+# Detections are produced in bulk by the detector, so they are plain slotted
+# dataclasses rather than models: construction skips validation, while
+# Pydantic still validates and serializes them inside the API models.
+
+@dataclass(slots=True, frozen=True)
+class BoundingBox:
     """Pixel-space bounding box from detector."""
     x1: float
     y1: float
@@ -66,7 +96,8 @@ class BoundingBox(BaseModel):
     y2: float
 
 
-class Detection(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Detection:
     """Single object detection from YOLOv8."""
     detection_id: str
     label: DetectedClass
@@ -78,6 +109,50 @@ class Detection(BaseModel):
     is_stationary: bool = True
 
 
+class DetectedClassId(IntEnum):
+    """Dense ordinals for ``DetectedClass``, assigned once at detection time.
+
+    Like ``VehicleTypeId``, member names equal the wire strings; batch code
+    indexes tables and compares ints instead of hashing label strings.
+    """
+    car = 0
+    truck = 1
+    bus = 2
+    motorcycle = 3
+    bicycle = 4
+    person = 5
+
+
+DETECTED_CLASS_ID: dict[str, int] = {dc.name: dc.value for dc in DetectedClassId}
+
+
+@dataclass(slots=True)
+class DetectionBatch:
+    """Structure-of-arrays view of one frame's detections.
+
+    ``center_x``/``center_y`` (float64) and ``label_ids`` (uint8, see
+    ``DetectedClassId``) are row-aligned with ``detections``, so batch
+    consumers read contiguous arrays instead of per-object attributes.
+    """
+    detections: list[Detection]
+    center_x: np.ndarray
+    center_y: np.ndarray
+    label_ids: np.ndarray
+
+    @classmethod
+    def from_detections(cls, detections: list[Detection]) -> DetectionBatch:
+        n = len(detections)
+        return cls(
+            detections,
+            np.fromiter((d.center_x for d in detections), dtype=np.float64, count=n),
+            np.fromiter((d.center_y for d in detections), dtype=np.float64, count=n),
+            np.fromiter((DETECTED_CLASS_ID[d.label] for d in detections), dtype=np.uint8, count=n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.detections)
+
+
 class ZoneDefinition(BaseModel):
     """A polygon zone drawn by the user on the image."""
     zone_id: str
@@ -86,10 +161,11 @@ class ZoneDefinition(BaseModel):
     label: str = ""
 
 
-class DetectionInZone(BaseModel):
-    """A detection mapped to a zone."""
+@dataclass(slots=True, frozen=True)
+class DetectionInZone:
+    """A detection mapped to a zone (``zone`` is None outside every zone)."""
     detection: Detection
-    zone: ZoneDefinition | None = None
+    zone: ZoneDefinition | None
     vehicle_type: VehicleType
     lane_type: LaneType
     is_in_transit: bool = False
@@ -1,20 +1,29 @@
 from __future__ import annotations
 
 import base64
+import dataclasses
 import json
 import sys
 import uuid
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import cv2
 import numpy as np
-import pandas as pd
-import plotly.express as px
 import requests
 import streamlit as st
 from PIL import Image
-from streamlit_drawable_canvas import st_canvas
+
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional; requests accepts str or bytes fields
+    _json_dumps = json.dumps
+
+if TYPE_CHECKING:
+    import pandas
 
 # Ensure project root is on sys.path so `app.*` imports work when running
 # via `streamlit run dashboard/app.py` from the project root.
@@ -25,6 +34,7 @@ if _PROJECT_ROOT not in sys.path:
 from app.analytics import occupancy_rate, summarize_decisions  # noqa: E402
 from app.cv.annotator import draw_annotations  # noqa: E402
 from app.cv.detector import VehicleDetector  # noqa: E402
+from app.cv.image_io import decode_image, encode_jpeg  # noqa: E402
 from app.cv.lane_detector import LaneDetector  # noqa: E402
 from app.cv.zone_analyzer import ZoneAnalyzer  # noqa: E402
 from app.rules_engine import RulesEngine  # noqa: E402
@@ -35,6 +45,7 @@ from app.schemas import (  # noqa: E402
 )
 
 API_BASE = "http://localhost:8000"
+HISTORY_CSV = Path(_PROJECT_ROOT) / "data" / "sample_results.csv"
 
 st.set_page_config(page_title="NYC Curb Utilization Dashboard", layout="wide")
 st.title("NYC Curb Utilization Dashboard")
@@ -65,10 +76,16 @@ def _get_rules_engine() -> RulesEngine:
     return RulesEngine()
 
 
+@st.cache_resource
+def _get_http_session() -> requests.Session:
+    # Shared across reruns so keep-alive connections to the API are reused
+    return requests.Session()
+
+
 def _api_is_reachable() -> bool:
     """Check if the FastAPI backend is running."""
     try:
-        resp = requests.get(f"{API_BASE}/health", timeout=2)
+        resp = _get_http_session().get(f"{API_BASE}/health", timeout=2)
         return resp.status_code == 200
     except Exception:
         return False
@@ -110,6 +127,26 @@ def _parse_canvas_shapes(
     return zones
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _parse_canvas_shapes_cached(
+    objects_json: str, zone_type: str, img_width: int, img_height: int, scale: float,
+) -> list[dict]:
+    """Parse and rescale canvas shapes; reruns with an unchanged canvas hit the cache."""
+    zones = _parse_canvas_shapes(json.loads(objects_json), zone_type, img_width, img_height)
+    if scale != 1.0:
+        for z in zones:
+            z["polygon"] = (np.asarray(z["polygon"], dtype=np.float64) / scale).tolist()
+    return zones
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _load_history(path: str, mtime: float) -> pandas.DataFrame:
+    """Read the history CSV once per file version (``mtime`` keys the cache)."""
+    import pandas as pd
+
+    return pd.read_csv(path)
+
+
 def _run_analysis_inline(
     uploaded_file,
     zones: list[dict],
@@ -118,11 +155,8 @@ def _run_analysis_inline(
     camera_id: str,
 ) -> None:
     """Run the full CV pipeline directly (no API server needed)."""
-    uploaded_file.seek(0)
-    image_bytes = uploaded_file.read()
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    cv_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    h, w = cv_image.shape[:2]
+    cv_image, w, h = decode_image(uploaded_file.getvalue())
+    coord_scale = w / cv_image.shape[1]
 
     frame = FrameContext(
         frame_id=f"frame_{uuid.uuid4().hex[:8]}",
@@ -136,46 +170,59 @@ def _run_analysis_inline(
 
     # Detect vehicles
     detector = _get_detector()
-    detections = detector.detect(cv_image)
+    batch = detector.detect_batch(cv_image, coord_scale)
+    detections = batch.detections
 
     # Auto-detect lanes
     lane_det = _get_lane_detector()
-    auto_zones = lane_det.detect_lanes(cv_image)
+    auto_zones = lane_det.detect_lanes(cv_image, coord_scale)
 
     # Combine zones and assign detections
     all_zones = zone_defs + auto_zones
     za = _get_zone_analyzer()
     za.load_zones(all_zones)
-    assignments = za.assign_detections_to_zones(detections)
+    assignments = za.assign_detections_to_zones(batch)
     observations = za.detections_to_observations(assignments)
 
     # Evaluate legality
     engine = _get_rules_engine()
-    decisions = [
-        engine.evaluate_with_zone(frame, obs, assignment.zone, assignment.is_in_transit)
-        for obs, assignment in zip(observations, assignments)
-    ]
+    decisions = engine.evaluate_batch_with_zone(
+        frame,
+        observations,
+        [a.zone for a in assignments],
+        [a.is_in_transit for a in assignments],
+    )
 
     # Analytics
     occ = occupancy_rate(observations)
     summary = summarize_decisions(decisions)
 
     # Annotate image
-    annotated = draw_annotations(cv_image, detections, assignments, decisions, all_zones)
-    _, buffer = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, 85])
-    annotated_b64 = base64.b64encode(buffer).decode("utf-8")
+    decision_map = {d.track_id: d for d in decisions}
+    annotated = draw_annotations(
+        cv_image, detections, assignments, decision_map, all_zones, coord_scale,
+    )
 
-    # Serialize to the same dict shape the API returns
+    # Serialize to the same dict shape _run_analysis_api stores
     st.session_state.analysis_result = {
         "frame_id": frame.frame_id,
         "image_width": w,
         "image_height": h,
-        "detections": [d.model_dump() for d in detections],
-        "zone_assignments": [a.model_dump() for a in assignments],
+        "detections": [dataclasses.asdict(d) for d in detections],
+        "zone_assignments": [
+            {
+                "detection": dataclasses.asdict(a.detection),
+                "zone": a.zone.model_dump() if a.zone else None,
+                "vehicle_type": a.vehicle_type,
+                "lane_type": a.lane_type,
+                "is_in_transit": a.is_in_transit,
+            }
+            for a in assignments
+        ],
         "occupancy_rate": occ,
         "decisions": [d.model_dump() for d in decisions],
         "summary": summary,
-        "annotated_image_b64": annotated_b64,
+        "annotated_image": encode_jpeg(annotated, quality=85),
     }
     st.success("Analysis complete! Switch to the **Analysis Results** tab.")
 
@@ -199,16 +246,18 @@ def _run_analysis_api(
         "zones": zones,
     }
 
-    uploaded_file.seek(0)
     try:
-        resp = requests.post(
+        resp = _get_http_session().post(
             f"{API_BASE}/analyze/image",
-            files={"image": (uploaded_file.name, uploaded_file.read(), uploaded_file.type)},
-            data={"request_json": json.dumps(request_payload)},
+            files={"image": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)},
+            data={"request_json": _json_dumps(request_payload)},
             timeout=120,
         )
         resp.raise_for_status()
-        st.session_state.analysis_result = resp.json()
+        result = resp.json()
+        # Decode once here rather than on every rerun of the results tab
+        result["annotated_image"] = base64.b64decode(result.pop("annotated_image_b64", ""))
+        st.session_state.analysis_result = result
         st.success("Analysis complete! Switch to the **Analysis Results** tab.")
     except requests.ConnectionError:
         st.error(
@@ -242,6 +291,8 @@ with tab1:
     )
 
     if uploaded_file:
+        from streamlit_drawable_canvas import st_canvas
+
         image = Image.open(uploaded_file)
         img_w, img_h = image.size
 
@@ -283,13 +334,9 @@ with tab1:
         if canvas_result.json_data is not None:
             objects = canvas_result.json_data.get("objects", [])
             if objects:
-                new_zones = _parse_canvas_shapes(objects, zone_type, img_w, img_h)
-                if scale != 1.0:
-                    for z in new_zones:
-                        z["polygon"] = [
-                            (x / scale, y / scale) for x, y in z["polygon"]
-                        ]
-                st.session_state.zones = new_zones
+                st.session_state.zones = _parse_canvas_shapes_cached(
+                    json.dumps(objects, sort_keys=True), zone_type, img_w, img_h, scale,
+                )
 
         # ── Zone summary ────────────────────────────────────────────────
         zones = st.session_state.zones
@@ -328,11 +375,14 @@ with tab2:
     if result is None:
         st.info("Upload an image and run analysis in **Tab 1** first.")
     else:
+        # Deferred so the upload tab renders before these heavy imports load
+        import pandas as pd
+        import plotly.express as px
+
         # ── Annotated image ─────────────────────────────────────────────
-        if result.get("annotated_image_b64"):
+        if result.get("annotated_image"):
             st.subheader("Annotated Image")
-            ann_bytes = base64.b64decode(result["annotated_image_b64"])
-            st.image(ann_bytes, use_container_width=True)
+            st.image(result["annotated_image"], use_container_width=True)
 
         # ── Summary metrics ─────────────────────────────────────────────
         st.subheader("Summary")
@@ -346,41 +396,39 @@ with tab2:
 
         # ── Detection details table ─────────────────────────────────────
         st.subheader("Detection Details")
-        det_rows = []
+        det_cols: dict[str, list] = {
+            "ID": [], "Label": [], "Classification": [], "Zone": [], "In Transit": [], "Confidence": [],
+        }
         for za in result.get("zone_assignments", []):
             det = za.get("detection", {})
             zone = za.get("zone")
-            det_rows.append({
-                "ID": det.get("detection_id", ""),
-                "Label": det.get("label", ""),
-                "Classification": det.get("classification", "unknown"),
-                "Zone": zone["zone_type"].replace("_", " ").title() if zone else "None",
-                "In Transit": za.get("is_in_transit", False),
-                "Confidence": f"{det.get('confidence', 0):.2f}",
-            })
-        if det_rows:
-            st.dataframe(pd.DataFrame(det_rows), use_container_width=True)
+            det_cols["ID"].append(det.get("detection_id", ""))
+            det_cols["Label"].append(det.get("label", ""))
+            det_cols["Classification"].append(det.get("classification", "unknown"))
+            det_cols["Zone"].append(zone["zone_type"].replace("_", " ").title() if zone else "None")
+            det_cols["In Transit"].append(za.get("is_in_transit", False))
+            det_cols["Confidence"].append(f"{det.get('confidence', 0):.2f}")
+        if det_cols["ID"]:
+            st.dataframe(pd.DataFrame(det_cols), use_container_width=True)
         else:
             st.caption("No detections found.")
 
         # ── Legality decisions table ────────────────────────────────────
         st.subheader("Legality Decisions")
-        dec_rows = []
-        for d in result.get("decisions", []):
-            dec_rows.append({
-                "Track ID": d["track_id"],
-                "Status": d["status"],
-                "Reason Codes": ", ".join(d.get("reason_codes", [])),
-                "Confidence": f"{d.get('confidence', 0):.2f}",
-            })
-        if dec_rows:
-            st.dataframe(pd.DataFrame(dec_rows), use_container_width=True)
+        decisions = result.get("decisions", [])
+        if decisions:
+            st.dataframe(
+                pd.DataFrame({
+                    "Track ID": [d["track_id"] for d in decisions],
+                    "Status": [d["status"] for d in decisions],
+                    "Reason Codes": [", ".join(d.get("reason_codes", [])) for d in decisions],
+                    "Confidence": [f"{d.get('confidence', 0):.2f}" for d in decisions],
+                }),
+                use_container_width=True,
+            )
 
         # ── Violation breakdown chart ───────────────────────────────────
-        reason_counts: dict[str, int] = {}
-        for d in result.get("decisions", []):
-            for rc in d.get("reason_codes", []):
-                reason_counts[rc] = reason_counts.get(rc, 0) + 1
+        reason_counts = Counter(rc for d in decisions for rc in d.get("reason_codes", []))
         if reason_counts:
             st.subheader("Violation Breakdown")
             fig = px.bar(
@@ -393,10 +441,9 @@ with tab2:
             st.plotly_chart(fig, use_container_width=True)
 
         # ── Vehicle type distribution ───────────────────────────────────
-        type_counts: dict[str, int] = {}
-        for za in result.get("zone_assignments", []):
-            vt = za.get("vehicle_type", "other")
-            type_counts[vt] = type_counts.get(vt, 0) + 1
+        type_counts = Counter(
+            za.get("vehicle_type", "other") for za in result.get("zone_assignments", [])
+        )
         if type_counts:
             st.subheader("Vehicle Type Distribution")
             fig2 = px.pie(
@@ -414,8 +461,10 @@ with tab3:
     st.header("Historical Analytics")
     st.caption("Trend data from previous analysis sessions.")
 
+    import plotly.express as px
+
     try:
-        df = pd.read_csv(Path(_PROJECT_ROOT) / "data" / "sample_results.csv")
+        df = _load_history(str(HISTORY_CSV), HISTORY_CSV.stat().st_mtime)
 
         c1, c2, c3 = st.columns(3)
         c1.metric("Avg Occupancy", f"{df['occupancy_rate'].mean():.1%}")
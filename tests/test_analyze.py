@@ -1,8 +1,10 @@
 from datetime import datetime, timezone
 
+import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.schemas import FrameContext
 
 
 client = TestClient(app)
@@ -44,3 +46,158 @@ def test_analyze_illegal_detection() -> None:
     assert "in_transit" in data["summary"]  # new key in summary
     assert data["decisions"][0]["status"] == "likely_illegal"
     assert "double_parking_detected" in data["decisions"][0]["reason_codes"]
+
+
+def test_evaluate_batch_matches_evaluate() -> None:
+    from itertools import product
+
+    from app.rules_engine import RulesEngine
+    from app.schemas import FrameContext, VehicleObservation
+
+    engine = RulesEngine()
+    frame = FrameContext(
+        frame_id="f1",
+        camera_id="cam_01",
+        timestamp_utc=datetime(2026, 1, 10, 1, 0, tzinfo=timezone.utc),
+        borough="manhattan",
+        segment_id="seg_1001",
+    )
+    observations = [
+        VehicleObservation(
+            track_id=f"t{i}",
+            vehicle_type=vehicle_type,
+            lane_type=lane_type,
+            is_double_parked=double_parked,
+            dwell_time_seconds=dwell,
+        )
+        for i, (vehicle_type, lane_type, double_parked, dwell) in enumerate(
+            product(("passenger", "commercial", "bus"), ("bus", "bike", "parking"), (False, True), (0, 2000))
+        )
+    ]
+
+    batch = engine.evaluate_batch(frame, observations)
+    single = [engine.evaluate(frame, obs) for obs in observations]
+    assert [d.model_dump() for d in batch] == [d.model_dump() for d in single]
+
+
+def _zone_frame(hour: int, minute: int = 0) -> FrameContext:
+    return FrameContext(
+        frame_id="f1",
+        camera_id="cam_01",
+        timestamp_utc=datetime(2026, 1, 10, hour, minute, tzinfo=timezone.utc),
+        borough="manhattan",
+        segment_id="seg_1001",
+    )
+
+
+@pytest.mark.parametrize(
+    ("hour", "minute", "vehicle_type", "lane_type", "zone_type", "dwell", "double_parked",
+     "in_transit", "status", "reason_codes"),
+    [
+        (12, 0, "passenger", "parking", "parking", 0, False, False, "legal", []),
+        (12, 0, "passenger", "parking", "no_parking", 0, False, False,
+         "likely_illegal", ["no_parking_zone_violation"]),
+        (12, 0, "passenger", "parking", "fire_hydrant", 0, False, False,
+         "likely_illegal", ["fire_hydrant_zone_violation"]),
+        (12, 0, "passenger", "parking", "bus_lane", 0, False, False,
+         "likely_illegal", ["bus_lane_occupied"]),
+        # Lane and zone agree: the code is reported once
+        (12, 0, "passenger", "bus", "bus_lane", 0, False, False,
+         "likely_illegal", ["bus_lane_occupied"]),
+        (12, 0, "bus", "parking", "bus_lane", 0, False, False, "legal", []),
+        (12, 0, "scooter", "parking", "bike_lane", 0, False, False,
+         "likely_illegal", ["bike_lane_occupied"]),
+        (12, 0, "bike", "parking", "bike_lane", 0, False, False, "legal", []),
+        (12, 0, "passenger", "parking", "loading_zone", 900, False, False, "legal", []),
+        (12, 0, "passenger", "parking", "loading_zone", 901, False, False,
+         "uncertain", ["dwell_time_exceeded", "loading_zone_passenger_overstay"]),
+        (12, 0, "commercial", "parking", "loading_zone", 1000, False, False, "legal", []),
+        (12, 0, "bus", "unknown", None, 301, False, False, "uncertain", ["dwell_time_exceeded"]),
+        (12, 0, "commercial", "travel", "travel_lane", 2000, True, False, "in_transit", []),
+        (12, 0, "passenger", "travel", None, 0, True, True, "in_transit", []),
+        # Overnight runs from 00:00 to 05:59 UTC
+        (5, 59, "commercial", "parking", None, 0, False, False,
+         "uncertain", ["overnight_commercial_restriction"]),
+        (6, 0, "commercial", "parking", None, 0, False, False, "legal", []),
+        (5, 59, "commercial", "bus", "no_parking", 2000, True, False, "likely_illegal", [
+            "double_parking_detected", "bus_lane_occupied", "dwell_time_exceeded",
+            "overnight_commercial_restriction", "no_parking_zone_violation",
+        ]),
+        (5, 59, "passenger", "parking", "parking", 0, False, False, "legal", []),
+    ],
+)
+def test_evaluate_with_zone_decisions(
+    hour, minute, vehicle_type, lane_type, zone_type, dwell, double_parked,
+    in_transit, status, reason_codes,
+) -> None:
+    from app.rules_engine import RulesEngine
+    from app.schemas import VehicleObservation, ZoneDefinition
+
+    engine = RulesEngine()
+    frame = _zone_frame(hour, minute)
+    observation = VehicleObservation(
+        track_id="t1",
+        vehicle_type=vehicle_type,
+        lane_type=lane_type,
+        is_double_parked=double_parked,
+        dwell_time_seconds=dwell,
+    )
+    zone = None
+    if zone_type is not None:
+        zone = ZoneDefinition(
+            zone_id="z1", zone_type=zone_type, polygon=[(0, 0), (10, 0), (10, 10)],
+        )
+
+    decision = engine.evaluate_with_zone(frame, observation, zone, in_transit)
+    assert (decision.status, decision.reason_codes) == (status, reason_codes)
+    [batch] = engine.evaluate_batch_with_zone(frame, [observation], [zone], [in_transit])
+    assert batch.model_dump() == decision.model_dump()
+
+
+def test_evaluate_batch_with_zone_matches_evaluate_with_zone() -> None:
+    from itertools import product
+    from typing import get_args
+
+    from app.rules_engine import RulesEngine
+    from app.schemas import VehicleObservation, VehicleType, ZoneDefinition, ZoneType
+
+    engine = RulesEngine()
+    zones = [None] + [
+        ZoneDefinition(
+            zone_id=f"z_{zone_type}", zone_type=zone_type, polygon=[(0, 0), (10, 0), (10, 10)],
+        )
+        for zone_type in get_args(ZoneType)
+    ]
+    cases = list(product(
+        get_args(VehicleType), ("bus", "bike", "parking"), (0, 901, 2000), (False, True),
+        zones, (False, True),
+    ))
+    observations = [
+        VehicleObservation(
+            track_id=f"t{i}",
+            vehicle_type=vehicle_type,
+            lane_type=lane_type,
+            is_double_parked=double_parked,
+            dwell_time_seconds=dwell,
+        )
+        for i, (vehicle_type, lane_type, dwell, double_parked, _, _) in enumerate(cases)
+    ]
+    case_zones = [zone for *_, zone, _ in cases]
+    in_transit = [flag for *_, flag in cases]
+
+    for frame in (_zone_frame(5, 59), _zone_frame(6, 0)):
+        batch = engine.evaluate_batch_with_zone(frame, observations, case_zones, in_transit)
+        single = [
+            engine.evaluate_with_zone(frame, obs, zone, flag)
+            for obs, zone, flag in zip(observations, case_zones, in_transit)
+        ]
+        assert [d.model_dump() for d in batch] == [d.model_dump() for d in single]
+
+
+def test_vehicle_type_ids_match_literal() -> None:
+    from typing import get_args
+
+    from app.schemas import DetectedClass, DetectedClassId, VehicleType, VehicleTypeId
+
+    assert [vt.name for vt in VehicleTypeId] == list(get_args(VehicleType))
+    assert [dc.name for dc in DetectedClassId] == list(get_args(DetectedClass))
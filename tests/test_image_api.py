@@ -103,3 +103,46 @@ def test_analyze_image_no_zones() -> None:
     # All zone_assignments should have zone=None
     for za in data.get("zone_assignments", []):
         assert za["zone"] is None
+
+
+def test_analyze_image_large_upload_keeps_original_size() -> None:
+    """Large uploads are decoded at reduced resolution but report full size."""
+    import cv2
+
+    img = np.zeros((1600, 2400, 3), dtype=np.uint8)
+    _, buf = cv2.imencode(".jpg", img)
+    request_payload = {
+        "frame": {
+            "frame_id": "test_frame_003",
+            "camera_id": "cam_test",
+            "timestamp_utc": "2026-01-15T10:00:00Z",
+            "borough": "queens",
+            "segment_id": "seg_test",
+        },
+        "zones": [],
+    }
+
+    resp = client.post(
+        "/analyze/image",
+        files={"image": ("big.jpg", buf.tobytes(), "image/jpeg")},
+        data={"request_json": json.dumps(request_payload)},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["image_width"] == 2400
+    assert data["image_height"] == 1600
+
+
+def test_detect_falls_back_to_opencv_above_pillow_pixel_limit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Pillow's decompression-bomb check must not turn an upload into a 500."""
+    from PIL import Image
+
+    # Above twice MAX_IMAGE_PIXELS Pillow raises DecompressionBombError
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 10_000)
+    resp = client.post(
+        "/detect",
+        files={"image": ("test.jpg", _make_test_image_bytes(), "image/jpeg")},
+    )
+    assert resp.status_code == 200
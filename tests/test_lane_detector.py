@@ -0,0 +1,49 @@
+"""Tests for the lane detector's color segmentation."""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.cv.lane_detector import LaneDetector
+
+
+@pytest.mark.parametrize(
+    "lower, upper",
+    [
+        ((0, 0, 0), (179, 255, 255)),
+        ((0, 80, 80), (15, 255, 255)),
+        ((35, 80, 80), (85, 255, 255)),
+        ((90, 1, 1), (179, 254, 254)),
+        ((60, 120, 30), (60, 200, 220)),
+    ],
+)
+def test_fused_segmentation_matches_opencv(lower, upper):
+    color_numba = pytest.importorskip("app.cv._color_numba")
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(300, 400, 3), dtype=np.uint8)
+    lo = np.array(lower, dtype=np.uint8)
+    hi = np.array(upper, dtype=np.uint8)
+
+    # Swap the bands on the second output to catch any mix-up between them
+    bus, bike = color_numba.segment_hsv_bands(image, lo, hi, hi, lo)
+
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    np.testing.assert_array_equal(bus, cv2.inRange(hsv, lo, hi))
+    np.testing.assert_array_equal(bike, cv2.inRange(hsv, hi, lo))
+
+
+def test_fused_and_opencv_paths_find_the_same_lanes():
+    pytest.importorskip("numba")
+    image = np.zeros((300, 400, 3), dtype=np.uint8)
+    image[:, :150] = (40, 40, 200)  # red paint
+    image[:, 250:] = (60, 160, 40)  # green paint
+
+    fused = LaneDetector(fused_segmentation=True)
+    assert fused.fused_segmentation
+    fused_zones = fused.detect_lanes(image)
+    opencv_zones = LaneDetector().detect_lanes(image)
+
+    assert [(z.zone_type, z.polygon) for z in fused_zones] == [
+        (z.zone_type, z.polygon) for z in opencv_zones
+    ]
+    assert {z.zone_type for z in fused_zones} == {"bus_lane", "bike_lane"}
@@ -1,9 +1,11 @@
 """Tests for the zone analyzer — point-in-polygon and observation bridge."""
 
 import pytest
+from shapely import STRtree
+from shapely.geometry import Point, Polygon
 
 from app.cv.zone_analyzer import ZoneAnalyzer
-from app.schemas import BoundingBox, Detection, ZoneDefinition
+from app.schemas import BoundingBox, Detection, DetectionBatch, ZoneDefinition
 
 
 def _make_detection(x: float, y: float, label: str = "car") -> Detection:
@@ -19,9 +21,24 @@ def _make_detection(x: float, y: float, label: str = "car") -> Detection:
     )
 
 
-@pytest.fixture
-def analyzer() -> ZoneAnalyzer:
-    return ZoneAnalyzer()
+def _shapely_zone_ids(zones: list[ZoneDefinition], xs, ys) -> list[str | None]:
+    """Reference lookup: the first zone (load order) whose polygon contains each point."""
+    tree = STRtree([Polygon(z.polygon) for z in zones])
+    ids = []
+    for x, y in zip(xs, ys):
+        # 'within' is Shapely's strict point-in-polygon
+        hits = tree.query(Point(x, y), predicate="within")
+        ids.append(zones[int(hits.min())].zone_id if hits.size else None)
+    return ids
+
+
+@pytest.fixture(scope="module", params=["python", "numpy", "numba"])
+def analyzer(request: pytest.FixtureRequest) -> ZoneAnalyzer:
+    # Every test runs once per assignment backend. Shared across tests:
+    # each one starts with load_zones, which replaces all state
+    if request.param == "numba":
+        pytest.importorskip("numba")
+    return ZoneAnalyzer(backend=request.param)
 
 
 def test_detection_inside_zone(analyzer: ZoneAnalyzer) -> None:
@@ -163,3 +180,136 @@ def test_zone_priority_first_wins(analyzer: ZoneAnalyzer) -> None:
     results = analyzer.assign_detections_to_zones([_make_detection(50, 50)])
     assert results[0].zone is not None
     assert results[0].zone.zone_id == "z1"
+
+
+def test_concave_zone_batch_assignment(analyzer: ZoneAnalyzer) -> None:
+    """Points in the notch of a concave zone fall outside it."""
+    zone = ZoneDefinition(
+        zone_id="z1", zone_type="parking",
+        polygon=[(0, 0), (100, 0), (100, 100), (50, 40), (0, 100)],
+    )
+    analyzer.load_zones([zone])
+
+    results = analyzer.assign_detections_to_zones([
+        _make_detection(50, 20),
+        _make_detection(50, 80),
+        _make_detection(90, 80),
+        _make_detection(150, 50),
+    ])
+
+    assert [r.zone.zone_id if r.zone else None for r in results] == ["z1", None, "z1", None]
+
+
+def test_boundary_points_belong_to_the_next_containing_zone(analyzer: ZoneAnalyzer) -> None:
+    """A point on a zone's edge or vertex is not in that zone (Shapely contains)."""
+    zones = [
+        ZoneDefinition(
+            zone_id="a", zone_type="parking",
+            polygon=[(0, 0), (100, 0), (100, 100), (0, 100)],
+        ),
+        ZoneDefinition(
+            zone_id="b", zone_type="no_parking",
+            polygon=[(100, 0), (200, 0), (200, 100), (100, 100)],
+        ),
+        ZoneDefinition(
+            zone_id="c", zone_type="bus_lane",
+            polygon=[(50, 50), (300, 50), (300, 150), (50, 150)],
+        ),
+    ]
+    analyzer.load_zones(zones)
+
+    points = {
+        (0, 50): None,     # left edge of a, outside everything else
+        (50, 0): None,     # bottom edge of a
+        (0, 0): None,      # vertex of a
+        (100, 20): None,   # edge shared by a and b
+        (100, 0): None,    # vertex shared by a and b
+        (100, 70): "c",    # shared a/b edge, strictly inside c
+        (100, 100): "c",   # shared a/b vertex, strictly inside c
+        (150, 100): "c",   # top edge of b, strictly inside c
+        (70, 50): "a",     # strictly inside a, on c's bottom edge
+        (250, 50): None,   # on c's bottom edge only
+    }
+    results = analyzer.assign_detections_to_zones(
+        [_make_detection(x, y) for x, y in points]
+    )
+
+    assert [r.zone.zone_id if r.zone else None for r in results] == list(points.values())
+    xs, ys = zip(*points)
+    assert _shapely_zone_ids(zones, xs, ys) == list(points.values())
+
+
+def test_batch_path_matches_shapely(analyzer: ZoneAnalyzer) -> None:
+    """The batch assignment backend agrees with Shapely's containment."""
+    import numpy as np
+
+    zones = [
+        ZoneDefinition(
+            zone_id="z1", zone_type="parking",
+            polygon=[(0, 0), (100, 0), (100, 100), (50, 40), (0, 100)],
+        ),
+        ZoneDefinition(
+            zone_id="z2", zone_type="bus_lane",
+            polygon=[(60, 30), (300, 30), (300, 90), (60, 90)],
+        ),
+        ZoneDefinition(
+            zone_id="z3", zone_type="no_parking",
+            polygon=[(200, 200), (260, 200), (230, 250)],
+        ),
+    ]
+    analyzer.load_zones(zones)
+    # Integer grid: many points sit exactly on edges and vertices
+    grid = np.arange(-10.0, 320.0, 5.0)
+    xs, ys = (a.ravel() for a in np.meshgrid(grid, grid))
+
+    indices = analyzer._zone_indices(xs, ys)
+
+    got = [zones[i].zone_id if i >= 0 else None for i in indices]
+    assert got == _shapely_zone_ids(zones, xs.tolist(), ys.tolist())
+
+
+def test_detection_batch_matches_list(analyzer: ZoneAnalyzer) -> None:
+    analyzer.load_zones([
+        ZoneDefinition(
+            zone_id="z1", zone_type="bus_lane",
+            polygon=[(0, 0), (100, 0), (100, 100), (0, 100)],
+        ),
+    ])
+    detections = [
+        _make_detection(50, 50, "car"),
+        _make_detection(50, 50, "bus"),
+        _make_detection(150, 50, "bicycle"),
+    ]
+
+    batch = DetectionBatch.from_detections(detections)
+
+    assert analyzer.assign_detections_to_zones(batch) == analyzer.assign_detections_to_zones(detections)
+
+
+def test_points_on_downward_edges_stay_outside(analyzer: ZoneAnalyzer) -> None:
+    """A point on an edge's line must not count as crossing it."""
+    analyzer.load_zones([
+        ZoneDefinition(
+            zone_id="z1", zone_type="parking",
+            polygon=[(0, 0), (100, 0), (100, 100), (0, 100)],
+        ),
+    ])
+
+    results = analyzer.assign_detections_to_zones([
+        _make_detection(100, 50),
+        _make_detection(100, 0),
+    ])
+
+    assert [r.zone for r in results] == [None, None]
+
+
+def test_loading_zones_keeps_them_comparable(analyzer: ZoneAnalyzer) -> None:
+    zone = ZoneDefinition(
+        zone_id="z1", zone_type="parking",
+        polygon=[(0, 0), (100, 0), (100, 100), (0, 100)],
+    )
+    copy = zone.model_copy()
+    analyzer.load_zones([zone, copy])
+
+    assert zone == copy
+    assert zone.model_dump() == copy.model_dump()